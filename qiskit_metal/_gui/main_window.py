@@ -706,6 +706,7 @@ class MetalGUI(QMainWindowBaseHandler):
 
             * Refreshes the design names in the gui
             * Refreshes the table models
+            * Refreshes the component and renderer options trees
             * Replots everything
 
         Warning:
@@ -719,6 +720,15 @@ class MetalGUI(QMainWindowBaseHandler):
         # Table models
         self.ui.tableComponents.model().refresh()
 
+        # Options trees
+        if self.component_window:
+            self.component_window.model.notify_changed()
+        for renderer_gui in (self.main_window.gds_gui,
+                             self.main_window.hfss_gui,
+                             self.main_window.q3d_gui):
+            if renderer_gui:
+                renderer_gui.tree_model.notify_changed()
+
         # Redraw plots
         self.refresh_plot()
 
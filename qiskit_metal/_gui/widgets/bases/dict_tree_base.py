@@ -14,13 +14,15 @@
 """Dict tree base."""
 
 import ast
+import sys
 from pathlib import Path
 from typing import Union, TYPE_CHECKING
 
 import numpy as np
 import PySide2
 from PySide2 import QtCore, QtGui, QtWidgets
-from PySide2.QtCore import QAbstractItemModel, QModelIndex, QTimer, Qt
+from PySide2.QtCore import (QAbstractItemModel, QEvent, QModelIndex,
+                            QPersistentModelIndex, QTimer, Qt)
 from PySide2.QtGui import QFont
 from PySide2.QtWidgets import (QAbstractItemView, QApplication, QFileDialog,
                                QWidget, QTreeView, QLabel, QMainWindow,
@@ -65,6 +67,24 @@ def get_nested_dict_item(dic: dict, key_list: list):
     return dic
 
 
+def _row_runs(rows: list) -> list:
+    """Group sorted row numbers into runs of contiguous rows.
+
+    Args:
+        rows (list): Row numbers, in increasing order
+
+    Returns:
+        list: List of [first, last] pairs, one per run
+    """
+    runs = []
+    for row in rows:
+        if runs and row == runs[-1][1] + 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return runs
+
+
 class BranchNode:
     """A BranchNode object has a nonzero number of child nodes. These child
     nodes can be either BranchNodes or LeafNodes.
@@ -76,18 +96,31 @@ class BranchNode:
     identify their respective positions within each tuple pair.
     """
 
-    def __init__(self, name: str, parent=None, data: dict = None):
+    __slots__ = ('name', 'parent', 'children', '_child_index', '_data',
+                 '_raw_dict', '_loaded', '_row_in_parent')
+
+    def __init__(self,
+                 name: str,
+                 parent=None,
+                 data: dict = None,
+                 raw_dict: dict = None):
         """
         Args:
             name (str): Name of this branch
             parent ([type]): The parent.  Defaults to None.
             data (dict): Node data.  Defaults to None.
+            raw_dict (dict): The (sub)dictionary this branch shows, used to
+                create its children on demand.  Defaults to None.
         """
         super(BranchNode, self).__init__()
         self.name = name
         self.parent = parent
         self.children = []
+        self._child_index = {}  # child name -> child node, for childWithKey
         self._data = data  # dictionary containing the actual data
+        self._raw_dict = raw_dict
+        self._loaded = False  # True once children were created from _raw_dict
+        self._row_in_parent = -1  # kept up to date by the parent
 
     def __len__(self):
         """Gets the number of children.
@@ -105,6 +138,20 @@ class BranchNode:
         """
         return self.name  # identifier for BranchNode
 
+    def display(self, column: int):
+        """Gets the text shown for this branch in the given column.
+
+        Args:
+            column (int): The column
+
+        Returns:
+            str: The name in the first column, '' otherwise
+        """
+        # A branch is a nested subdictionary, which can be expanded
+        if column == 0:
+            return self.name
+        return ''
+
     def childAtRow(self, row: int):
         """Gets the child at the given row.
 
@@ -126,9 +173,10 @@ class BranchNode:
         Returns:
             int: Row of the given child.  -1 is returned if the child is not found.
         """
-        for i, (_, childnode) in enumerate(self.children):
-            if child == childnode:
-                return i
+        row = child._row_in_parent
+        if (0 <= row < len(self.children)) and \
+                (self.children[row][NODE] is child):
+            return row
         return -1
 
     def childWithKey(self, key):
@@ -141,10 +189,7 @@ class BranchNode:
             Node: The child with the same name as the given key.
             None is returned if the child is not found
         """
-        for childname, childnode in self.children:
-            if key == childname:
-                return childnode
-        return None
+        return self._child_index.get(key)
 
     def insertChild(self, child):
         """Insert the given child.
@@ -153,7 +198,25 @@ class BranchNode:
             child (Node): The child
         """
         child.parent = self
-        self.children.append((child.provideName(), child))
+        child._row_in_parent = len(self.children)
+        name = child.provideName()
+        self.children.append((name, child))
+        self._child_index[name] = child
+
+    def removeChildren(self, row: int, count: int):
+        """Remove count children, starting at the given row.
+
+        Args:
+            row (int): The first row to remove
+            count (int): The number of rows to remove
+        """
+        for name, child in self.children[row:row + count]:
+            del self._child_index[name]
+            child._row_in_parent = -1
+        del self.children[row:row + count]
+        # Renumber the children that moved up
+        for i in range(row, len(self.children)):
+            self.children[i][NODE]._row_in_parent = i
 
     def hasLeaves(self):
         """Do I have leaves?
@@ -175,21 +238,59 @@ class LeafNode:
     deep).
     """
 
-    def __init__(self, label: str, parent=None, path=None):
+    __slots__ = ('_path', 'parent', 'label', '_parent_dict', '_disp_k',
+                 '_disp_v', '_disp_v_of', '_row_in_parent')
+
+    def __init__(self,
+                 label: str,
+                 parent=None,
+                 path=None,
+                 parent_dict: dict = None):
         """
         Args:
             label (str): Label for the leaf node
             parent (Node): The parent.  Defaults to None.
-            path (list): Node path.  Defaults to None.
+            path (tuple): Node path.  Defaults to None, in which case it is
+                derived from the parent chain when first needed.
+            parent_dict (dict): The (sub)dictionary holding this leaf's
+                key-value pair.  Defaults to None, in which case the value
+                is looked up along the path.  The model's setData always
+                checks it against the data dict before writing.
         """
         super(LeafNode, self).__init__()
-        self.path = path or []
+        self._path = path
         self.parent = parent
         self.label = label
+        self._parent_dict = parent_dict
+        self._row_in_parent = -1  # kept up to date by the parent
+        # Cached display strings of the label and value, see display()
+        self._disp_k = None
+        self._disp_v = None
+        self._disp_v_of = None  # the value _disp_v was made from
+
+    @property
+    def path(self):
+        """Returns the keys from the root down to this leaf.
+
+        Unless given at construction, this is worked out from the names
+        of the parent nodes the first time it is needed.
+        """
+        if self._path is None:
+            keys = []
+            node = self
+            while node.parent is not None:
+                keys.append(node.provideName())
+                node = node.parent
+            if node is self:
+                return ()  # not attached to a tree yet
+            self._path = tuple(reversed(keys))
+        return self._path
 
     @property
     def value(self):
         """Returns the value."""
+        if self._parent_dict is not None:
+            return self._parent_dict[self.label]
         return get_nested_dict_item(self.parent._data, self.path)
 
     # @value.setter
@@ -204,6 +305,31 @@ class LeafNode:
         """
         return self.label  # identifier for LeafNode (note: NOT value!)
 
+    def display(self, column: int):
+        """Gets the text shown for this leaf in the given column.
+
+        Args:
+            column (int): The column
+
+        Returns:
+            str: The key in the first column, the value in the second
+            column, None otherwise
+        """
+        if column == 0:
+            if self._disp_k is None:
+                self._disp_k = str(self.label)  # key
+            return self._disp_k
+        if column == 1:
+            value = self.value
+            if (self._disp_v is None) or (value is not self._disp_v_of) or \
+                    (type(value).__hash__ is None):
+                # Mutable (unhashable) values can change in place, so
+                # their text is not reused
+                self._disp_v = str(value)  # value
+                self._disp_v_of = value
+            return self._disp_v
+        return None
+
 
 class QTreeModel_Base(QAbstractItemModel):
     """Tree model for a general hierarchical dataset.
@@ -215,7 +341,14 @@ class QTreeModel_Base(QAbstractItemModel):
     Access using ``gui.component_window.model``.
     """
 
-    __refreshtime = 500  # 0.5 second refresh time
+    __refreshtime = 5000  # 5 second watchdog, for changes that were not reported
+    __throttletime = 100  # collapse bursts of changes into one rebuild
+    __resizetime = 1000  # minimum time between column auto-resizes
+
+    _BOLD_FONT = None  # shared bold font, needs a QApplication so made in __init__
+    _ALIGN_TL = int(Qt.AlignTop | Qt.AlignLeft)
+    _FLAGS = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+    _FLAGS_EDITABLE = _FLAGS | Qt.ItemIsEditable
 
     # NOTE: __init__ takes in design as extra parameter compared to table_model_options!
 
@@ -235,6 +368,10 @@ class QTreeModel_Base(QAbstractItemModel):
         self.logger = gui.logger
         self._gui = gui
         self._rowCount = -1
+        self._data_token_seen = None
+        self._version = 0  # bumped on every known change to the data dict
+        self._last_seen_version = -1  # version the tree was last built from
+        self._refresh_interval = self.__refreshtime
         self._view = view
         self.optionstype = child
         if self.optionstype == 'component':
@@ -242,11 +379,39 @@ class QTreeModel_Base(QAbstractItemModel):
 
         self.root = BranchNode('')
         self.headers = ['Name', 'Value']
-        self.paths = []
+
+        if QTreeModel_Base._BOLD_FONT is None:
+            QTreeModel_Base._BOLD_FONT = QFont()
+            QTreeModel_Base._BOLD_FONT.setBold(True)
+        # Handlers used by data(), by role
+        self._role_handlers = {
+            # The data in a form suitable for editing in an editor. (QString)
+            Qt.EditRole:
+                self._data_display,
+            Qt.DisplayRole:
+                self._data_display,
+            Qt.FontRole:
+                self._data_font,
+            Qt.TextAlignmentRole:
+                self._data_alignment,
+        }
+
+        # Cells written by setData, signalled together on the next pass
+        # through the event loop
+        self._pending_changed = []  # list of QPersistentModelIndex
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush_changes)
 
         self._start_timer()
         self.load()
 
+        if self._view is not None:
+            # All rows are single lines of text: let the view use one row
+            # height instead of asking each row for its size hint.
+            self._view.setUniformRowHeights(True)
+            self._view.setAnimated(False)
+
     @property
     def gui(self):
         """Returns the GUI."""
@@ -266,81 +431,355 @@ class QTreeModel_Base(QAbstractItemModel):
 
     def _start_timer(self):
         """Start and continuously refresh timer in background to keep the total
-        number of rows up to date."""
+        number of rows up to date.
+
+        Changes to the data dict are normally reported through
+        `notify_changed`. The timer is a slow watchdog for changes that
+        were not reported: each tick only compares a cheap signature of
+        the data dict, see `_data_token`. It catches the data dict or a
+        dict nested directly in it being replaced, and a change in the
+        number of keys of either. Changes deeper down, and values changed
+        in place, still need `notify_changed`. The rebuild itself goes
+        through a single-shot throttle timer, so a burst of changes
+        results in one rebuild once the dict has settled.
+
+        If there is a view, the timer only runs while the view is visible,
+        see `eventFilter`.
+        """
         self.timer = QTimer(self)
-        self.timer.start(self.__refreshtime)
-        self.timer.timeout.connect(self.auto_refresh)
+        self.timer.setInterval(self._refresh_interval)
+        self.timer.timeout.connect(self._check_data_token)
+
+        self._refresh_throttle = QTimer(self)
+        self._refresh_throttle.setSingleShot(True)
+        self._refresh_throttle.setInterval(self.__throttletime)
+        self._refresh_throttle.timeout.connect(self.auto_refresh)
+
+        # Started by each column auto-resize; no other resize while active.
+        # A resize skipped meanwhile is done once the cooldown runs out.
+        self._resize_pending = False
+        self._resize_cooldown = QTimer(self)
+        self._resize_cooldown.setSingleShot(True)
+        self._resize_cooldown.setInterval(self.__resizetime)
+        self._resize_cooldown.timeout.connect(self._resize_cooldown_done)
+
+        if self._view is None:
+            self.timer.start()
+        else:
+            self._view.installEventFilter(self)
+            if self._view.isVisible():
+                self.timer.start()
+
+    def eventFilter(self, obj: QtCore.QObject, event: QEvent) -> bool:
+        """Start the refresh timer when the view is shown, and stop it when
+        the view is hidden.
+
+        Args:
+            obj (QtCore.QObject): The watched object
+            event (QEvent): The event
+
+        Returns:
+            bool: False, the event is never filtered out
+        """
+        if obj is self._view:
+            if event.type() == QEvent.Show:
+                # Catch up on changes made while hidden
+                self._check_data_token()
+                self.timer.start()
+            elif event.type() == QEvent.Hide:
+                self.timer.stop()
+        return super().eventFilter(obj, event)
+
+    def set_refresh_interval(self, msec: int):
+        """Set how often the watchdog timer checks the data dict for changes.
+
+        Args:
+            msec (int): Interval in milliseconds
+        """
+        self._refresh_interval = msec
+        self.timer.setInterval(msec)
+
+    def notify_changed(self):
+        """Tell the model that its data dict has changed.
+
+        The tree is rebuilt shortly after, once a burst of notifications
+        has settled, without waiting for the watchdog timer.
+        """
+        self._version += 1
+        if not self._refresh_throttle.isActive():
+            self._refresh_throttle.start()
+
+    def _data_token(self):
+        """Cheap signature of the data dict, used to detect changes without
+        walking the whole tree.
+
+        Returns:
+            tuple: Identity and size of the data dict and of the dicts
+            nested directly in it, or None if there is no data to show
+        """
+        if (self.optionstype == 'component') and (not self.component):
+            return None
+        data = self.data_dict
+        subdicts = [v for v in data.values() if isinstance(v, dict)]
+        return (id(data), len(data), tuple(id(v) for v in subdicts),
+                sum(len(v) for v in subdicts))
+
+    def _check_data_token(self):
+        """Timer callback.
+
+        Report a change if the signature of the data dict differs from the
+        one seen on the last tick.
+        """
+        token = self._data_token()
+        if token != self._data_token_seen:
+            self._data_token_seen = token
+            self.notify_changed()
 
     def auto_refresh(self):
-        """Check to see if the total number of rows has been changed.
+        """Rebuild the model and tree after the data dict has changed.
 
-        If so, completely rebuild the model and tree.
+        Called through the refresh throttle, not on every timer tick.
+        Does nothing if the tree has been rebuilt since the last change.
         """
-        # TODO: Check if new nodes have been added; if so, rebuild model.
-        newRowCount = self.rowCount(self.createIndex(0, 0))
+        if self._version == self._last_seen_version:
+            return
+        self.load()
+        newRowCount = len(self.root)
         if self._rowCount != newRowCount:
-            self.modelReset.emit()
             self._rowCount = newRowCount
-            if self._view:
-                self._view.autoresize_columns()
+            self._autoresize_columns()
+
+    def _autoresize_columns(self):
+        """Resize the view's columns to their contents, if the view supports
+        it.
+
+        Resizing goes over the size hint of every visible row, so it is
+        done on the first row count change and then at most once per
+        cooldown period; changes within the cooldown are folded into a
+        single resize when the cooldown runs out.
+        """
+        autoresize = getattr(self._view, 'autoresize_columns', None)
+        if autoresize is None:
+            return
+        if self._resize_cooldown.isActive():
+            self._resize_pending = True
+            return
+        self._resize_pending = False
+        autoresize()
+        self._resize_cooldown.start()
+
+    def _resize_cooldown_done(self):
+        """Do the column resize skipped during the cooldown, if any."""
+        if self._resize_pending:
+            self._autoresize_columns()
 
     def refresh(self):
         """Force refresh.
 
-        Completely rebuild the model and tree.
+        Rebuild the tree, signalling only the rows that have changed.
         """
         self.load()  # rebuild the tree
-        self.modelReset.emit()
-
-    def getPaths(self, curdict: dict, curpath: list):
-        """Recursively finds and saves all root-to-leaf paths in model."""
-        for k, v in curdict.items():
-            if isinstance(v, dict):
-                self.getPaths(v, curpath + [k])
-            else:
-                self.paths.append(curpath + [k, v])
 
     def load(self):
-        """Builds a tree from a dictionary (self.data_dict)"""
+        """Builds a tree from a dictionary (self.data_dict)
+
+        The tree is built lazily: a branch only gets its child nodes when
+        the view first asks for its rows, see `_ensure_loaded`. The first
+        load, and any load after the data dict has been swapped for
+        another one, resets the model and only prepares the root.
+        Otherwise the branches that are already loaded are synced with the
+        dict, signalling only the rows that were added or removed. This
+        keeps the view's expanded state, selection and persistent indexes.
+        """
+        self._last_seen_version = self._version
         if (self.optionstype == 'component') and (not self.component):
+            if self.root._data is not None:
+                self.beginResetModel()
+                self._reset_root(None)
+                self.endResetModel()
             return
 
-        self.beginResetModel()
+        data_dict = self.data_dict
+        if self.root._data is not data_dict:
+            self.beginResetModel()
+            self._reset_root(data_dict)
+            # Emit a signal since the model's internal state
+            # (e.g. persistent model indexes) has been invalidated.
+            self.endResetModel()
+            return
+
+        self._sync_branch(self.root, data_dict)
 
+    def _reset_root(self, data_dict: dict):
+        """Drop the whole tree and point the root at the given dict.
+
+        Args:
+            data_dict (dict): The new data dict, or None
+        """
         # Set the data dict reference of the root node. The root node doesn't have a name.
-        self.root._data = self.data_dict
-
-        # Clear existing tree paths if any
-        self.paths.clear()
-        self.root.children.clear()
-
-        # Construct the paths -> sets self.paths
-        self.getPaths(self.data_dict, [])
-
-        for path in self.paths:
-            root = self.root
-            branch = None
-            # Combine final label and value for leaf node,
-            # so stop at 2nd to last element of each path
-            for key in path[:-2]:
-                # Look for childnode with the name 'key'. If it's not found, create a new branch.
-                branch = root.childWithKey(key)
-                if not branch:
-                    branch = BranchNode(key, data=self.data_dict)
-                    root.insertChild(branch)
-                root = branch
-            # If a LeafNode resides in the outermost dictionary, the above for loop is bypassed.
-            # [Note: This happens when the root-to-leaf path length is just 2.]
-            # In this case, add the LeafNode right below the master root.
-            # Otherwise, add the LeafNode below the final branch.
-            if not branch:
-                root.insertChild(LeafNode(path[-2], root, path=path[:-1]))
+        self.root._data = data_dict
+        self.root._raw_dict = data_dict
+        self.root.removeChildren(0, len(self.root))
+        self.root._loaded = False
+
+    def _ensure_loaded(self, branch: BranchNode):
+        """Create the direct children of a branch from its dict, if this
+        hasn't been done yet.
+
+        Args:
+            branch (BranchNode): The branch
+        """
+        if branch._loaded or (branch._raw_dict is None):
+            return
+        branch._loaded = True
+        for k, v in branch._raw_dict.items():
+            branch.insertChild(self._make_node(branch, k, v))
+
+    def _make_node(self, branch: BranchNode, key,
+                   value) -> Union[BranchNode, LeafNode]:
+        """Create an (unloaded) node for a key-value pair of a branch's dict.
+
+        Args:
+            branch (BranchNode): The branch the node goes under
+            key: The dict key
+            value: The dict value
+
+        Returns:
+            Union[BranchNode, LeafNode]: A BranchNode for a nested dict,
+            a LeafNode otherwise
+        """
+        if isinstance(key, str):
+            # Option trees repeat a small set of key names under many
+            # branches: share one string object per name
+            key = sys.intern(key)
+        if isinstance(value, dict):
+            return BranchNode(key, data=self.data_dict, raw_dict=value)
+        return LeafNode(key, branch, parent_dict=branch._raw_dict)
+
+    def _sync_branch(self, branch: BranchNode, curdict: dict):
+        """Bring a branch, and the loaded branches below it, in line with
+        its dict.
+
+        The keys that were removed or added are found by set difference
+        between the branch's child index and the dict keys, so a branch
+        whose keys did not change costs no per-child lookups for that.
+        Rows of removed keys are removed, new keys are appended in one
+        rows inserted signal, and children that changed between a nested
+        dict and a plain value are replaced (moving to the end).
+        dataChanged is emitted only for the leaves whose value is no longer
+        the one they last displayed, one signal per contiguous run of rows.
+        Branches that were never loaded only get the new dict.
+
+        Args:
+            branch (BranchNode): The branch
+            curdict (dict): The dict the branch should show
+        """
+        branch._raw_dict = curdict
+        if not branch._loaded:
+            return
+
+        index = branch._child_index
+        if index.keys() != curdict.keys():
+            gone = index.keys() - curdict.keys()
+            if gone:
+                self._remove_rows(
+                    branch, sorted(index[key]._row_in_parent for key in gone))
+            added = curdict.keys() - index.keys()
+            if added:
+                # Keep the dict order of the new keys
+                self._append_children(branch, [
+                    self._make_node(branch, k, v)
+                    for k, v in curdict.items()
+                    if k in added
+                ])
+
+        replaced = []
+        changed = []
+        for row, (key, child) in enumerate(branch.children):
+            value = curdict[key]
+            if isinstance(child, BranchNode) != isinstance(value, dict):
+                replaced.append(row)
+            elif isinstance(child, BranchNode):
+                self._sync_branch(child, value)
             else:
-                branch.insertChild(LeafNode(path[-2], branch, path=path[:-1]))
+                child._parent_dict = curdict
+                if (child._disp_v is not None) and \
+                        self._leaf_value_changed(child, value):
+                    child._disp_v = None
+                    changed.append(row)
+
+        last_column = len(self.headers) - 1
+        for first, last in _row_runs(changed):
+            self.dataChanged.emit(
+                self.createIndex(first, 1, branch.childAtRow(first)),
+                self.createIndex(last, last_column, branch.childAtRow(last)),
+                [Qt.DisplayRole])
+
+        if replaced:
+            keys = [branch.children[row][KEY] for row in replaced]
+            self._remove_rows(branch, replaced)
+            self._append_children(
+                branch, [self._make_node(branch, k, curdict[k]) for k in keys])
+
+    @staticmethod
+    def _leaf_value_changed(leaf: LeafNode, value) -> bool:
+        """Check if a displayed leaf's value differs from the one its
+        cached display string was made from.
+
+        Args:
+            leaf (LeafNode): The leaf, with a cached display string
+            value: The leaf's current value
+
+        Returns:
+            bool: True if the value was replaced, or is a mutable
+            (unhashable) value whose text has changed in place
+        """
+        if value is not leaf._disp_v_of:
+            return True
+        if type(value).__hash__ is None:
+            return str(value) != leaf._disp_v
+        return False
+
+    def _append_children(self, branch: BranchNode, children: list):
+        """Append new children to a branch, in one rows inserted signal.
+
+        Args:
+            branch (BranchNode): The branch
+            children (list): The new child nodes
+        """
+        first = len(branch)
+        self.beginInsertRows(self._index_of(branch), first,
+                             first + len(children) - 1)
+        for child in children:
+            branch.insertChild(child)
+        self.endInsertRows()
 
-        # Emit a signal since the model's internal state
-        # (e.g. persistent model indexes) has been invalidated.
-        self.endResetModel()
+    def _index_of(self, node: Union[BranchNode, LeafNode]) -> QModelIndex:
+        """Get the column 0 model index of a node that is in the tree.
+
+        Args:
+            node (Union[BranchNode, LeafNode]): The node
+
+        Returns:
+            QModelIndex: The index, invalid for the root
+        """
+        if node.parent is None:
+            return QModelIndex()
+        return self.createIndex(node.parent.rowOfChild(node), 0, node)
+
+    def _remove_rows(self, parent: BranchNode, rows: list):
+        """Remove children of a branch, one rows removed signal per
+        contiguous run of rows.
+
+        Args:
+            parent (BranchNode): The branch
+            rows (list): Rows to remove, in increasing order
+        """
+        parent_index = self._index_of(parent)
+        for first, last in reversed(_row_runs(rows)):
+            self.beginRemoveRows(parent_index, first, last)
+            parent.removeChildren(first, last - first + 1)
+            self.endRemoveRows()
 
     def rowCount(self, parent: QModelIndex):
         """Get the number of rows.
@@ -355,8 +794,29 @@ class QTreeModel_Base(QAbstractItemModel):
         node = self.nodeFromIndex(parent)
         if (node is None) or isinstance(node, LeafNode):
             return 0
+        self._ensure_loaded(node)
         return len(node)
 
+    def hasChildren(self, parent: QModelIndex):
+        """Check if the parent has any rows, without loading it.
+
+        The view asks this of every visible row to draw its expand
+        indicator. Qt's default goes through rowCount(), which would load
+        every visible branch, expanded or not.
+
+        Args:
+            parent (QModelIndex): The parent
+
+        Returns:
+            bool: True if the parent is a branch with children
+        """
+        node = self.nodeFromIndex(parent)
+        if not isinstance(node, BranchNode):
+            return False
+        if node._loaded:
+            return len(node) > 0
+        return bool(node._raw_dict)
+
     def columnCount(self, parent: QModelIndex):
         """Get the number of columns.
 
@@ -378,49 +838,60 @@ class QTreeModel_Base(QAbstractItemModel):
         Returns:
             object: Fetched data
         """
-        if not index.isValid():
+        # Most roles Qt asks for are not handled: check the role first
+        handler = self._role_handlers.get(role)
+        if (handler is None) or (not index.isValid()):
             return None
+        return handler(index)
 
-        # The data in a form suitable for editing in an editor. (QString)
-        if role == Qt.EditRole:
-            return self.data(index, Qt.DisplayRole)
+    def _data_display(self, index: QModelIndex):
+        """Gets the text shown in a cell, for the display and edit roles.
 
-        # Bold the first
-        if (role == Qt.FontRole) and (index.column() == 0):
-            font = QFont()
-            font.setBold(True)
-            return font
+        Args:
+            index (QModelIndex): Index to get data for
 
-        if role == Qt.TextAlignmentRole:
-            return int(Qt.AlignTop | Qt.AlignLeft)
+        Returns:
+            str: The text
+        """
+        node = self.nodeFromIndex(index)
+        if node is None:
+            return None
+        # the first column is either a leaf key or a branch
+        # the second column is always a leaf value or for a branch is ''.
+        return node.display(index.column())
 
-        if role == Qt.DisplayRole:
-            node = self.nodeFromIndex(index)
-            if node:
-                # the first column is either a leaf key or a branch
-                # the second column is always a leaf value or for a branch is ''.
-                if isinstance(node, BranchNode):
-                    # Handle a branch (which is a nested subdictionary, which can be expanded)
-                    if index.column() == 0:
-                        return node.name
-                    return ''
-                # We have a leaf
-                elif index.column() == 0:
-                    return str(node.label)  # key
-                elif index.column() == 1:
-                    return str(node.value)  # value
-                else:
-                    return None
+    def _data_font(self, index: QModelIndex):
+        """Gets the font of a cell: bold for the first column.
 
+        Args:
+            index (QModelIndex): Index to get data for
+
+        Returns:
+            QFont: The font, or None for the default font
+        """
+        if index.column() == 0:
+            return self._BOLD_FONT
         return None
 
+    def _data_alignment(self, index: QModelIndex):
+        """Gets the text alignment of a cell.
+
+        Args:
+            index (QModelIndex): Index to get data for
+
+        Returns:
+            int: Top left alignment
+        """
+        return self._ALIGN_TL
+
     def setData(self,
                 index: QModelIndex,
                 value,
                 role: Qt.ItemDataRole = Qt.EditRole) -> bool:
         """Set the LeafNode value and corresponding data entry to value.
-        Returns true if successful; otherwise returns false. The dataChanged()
-        signal should be emitted if the data was successfully set.
+        Returns true if successful; otherwise returns false. If the data was
+        successfully set, the dataChanged() signal is emitted on the next pass
+        through the event loop, together with any other edits made until then.
 
         Args:
             index (QModelIndex): The index
@@ -440,6 +911,14 @@ class QTreeModel_Base(QAbstractItemModel):
                 node = self.nodeFromIndex(index)
 
                 if isinstance(node, LeafNode):
+                    # The cached sub-dict is only re-pointed by a sync, so
+                    # check it is still the one in the data dict
+                    live_dict = get_nested_dict_item(self.data_dict,
+                                                     node.path[:-1])
+                    if live_dict is not node._parent_dict:
+                        node._parent_dict = live_dict
+                        self.notify_changed()  # the tree is out of date
+
                     value = str(value)  # new value
                     old_value = node.value  # option value
 
@@ -448,7 +927,6 @@ class QTreeModel_Base(QAbstractItemModel):
 
                     # Set the value of an option when the new value is different
                     else:
-                        dic = self.data_dict  # option dict
                         lbl = node.label  # option key
 
                         self.logger.info(
@@ -469,18 +947,39 @@ class QTreeModel_Base(QAbstractItemModel):
                             value = processed_value
                         #################################################
 
-                        if node.path:  # if nested option
-                            for x in node.path[:-1]:
-                                dic = dic[x]
-                            dic[node.path[-1]] = value
-                        else:  # if top-level option
-                            dic[lbl] = value
+                        node._parent_dict[lbl] = value
+                        node._disp_v = None
+                        self._pending_changed.append(
+                            QPersistentModelIndex(index))
+                        self._flush_timer.start(0)
                         if self.optionstype == 'component':
                             self.component.rebuild()
                             self.gui.refresh()
                         return True
         return False
 
+    def _flush_changes(self):
+        """Emit dataChanged for the cells written by setData since the last
+        flush, one signal per contiguous run of rows under the same parent.
+
+        Indexes whose rows were removed in the meantime are skipped.
+        """
+        rows_by_parent = {}
+        for index in self._pending_changed:
+            if index.isValid():
+                node = index.internalPointer()
+                rows_by_parent.setdefault(node.parent, set()).add(index.row())
+        self._pending_changed.clear()
+
+        last_column = len(self.headers) - 1
+        for parent, rows in rows_by_parent.items():
+            for first, last in _row_runs(sorted(rows)):
+                self.dataChanged.emit(
+                    self.createIndex(first, 1, parent.childAtRow(first)),
+                    self.createIndex(last, last_column,
+                                     parent.childAtRow(last)),
+                    [Qt.DisplayRole, Qt.EditRole])
+
     def headerData(self, section: int, orientation: Qt.Orientation,
                    role: Qt.ItemDataRole):
         """Set the headers to be displayed.
@@ -499,9 +998,7 @@ class QTreeModel_Base(QAbstractItemModel):
                     return self.headers[section]
 
             elif role == Qt.FontRole:
-                font = QFont()
-                font.setBold(True)
-                return font
+                return self._BOLD_FONT
 
         return None
 
@@ -516,9 +1013,10 @@ class QTreeModel_Base(QAbstractItemModel):
         Returns:
             int: internal index
         """
-        assert self.root
+        assert self.root is not None
         branch = self.nodeFromIndex(parent)
         assert branch is not None
+        self._ensure_loaded(branch)
         # The third argument is the internal index.
         return self.createIndex(row, column, branch.childAtRow(row))
 
@@ -540,8 +1038,8 @@ class QTreeModel_Base(QAbstractItemModel):
         grandparent = parent.parent
         if grandparent is None:
             return QModelIndex()
-        row = grandparent.rowOfChild(parent)
-        assert row != -1
+        row = parent._row_in_parent
+        assert grandparent.childAtRow(row) is parent
         return self.createIndex(row, 0, parent)
 
     def nodeFromIndex(self, index: QModelIndex) -> Union[BranchNode, LeafNode]:
@@ -565,13 +1063,12 @@ class QTreeModel_Base(QAbstractItemModel):
         Returns:
             list: List of flags
         """
-        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
         if index.column() == 1:
             node = self.nodeFromIndex(index)
             if isinstance(node, LeafNode):
-                return flags | Qt.ItemIsEditable
+                return self._FLAGS_EDITABLE
 
-        return flags
+        return self._FLAGS
 
 
 def parse_param_from_str(text):
@@ -15,9 +15,8 @@
 
 from typing import TYPE_CHECKING
 from PySide2.QtCore import QModelIndex, Qt
-from PySide2.QtGui import QFont
 from PySide2.QtWidgets import QTreeView, QWidget
-from ..bases.dict_tree_base import LeafNode, BranchNode, QTreeModel_Base, parse_param_from_str
+from ..bases.dict_tree_base import LeafNode, QTreeModel_Base, parse_param_from_str
 
 if TYPE_CHECKING:
     from ...main_window import MetalGUI
@@ -73,12 +72,7 @@ class QTreeModel_Options(QTreeModel_Base):
             if self._view:
                 self._view.hide_placeholder_text()
 
-            ###
-            # Count number of child nodes belonging to the parent.
-            node = self.nodeFromIndex(parent)
-            if (node is None) or isinstance(node, LeafNode):
-                return 0
-            return len(node)
+            return super().rowCount(parent)
 
     def data(self, index: QModelIndex, role: Qt.ItemDataRole = Qt.DisplayRole):
         """Gets the node data.
@@ -90,44 +84,23 @@ class QTreeModel_Options(QTreeModel_Base):
         Returns:
             object: fetched data
         """
-        if not index.isValid():
+        if (role not in self._role_handlers) or (self.component is None):
             return None
+        return super().data(index, role)
 
-        if self.component is None:
-            return None
-
-        # The data in a form suitable for editing in an editor. (QString)
-        if role == Qt.EditRole:
-            return self.data(index, Qt.DisplayRole)
-
-        # Bold the first
-        if (role == Qt.FontRole) and (index.column() == 0):
-            font = QFont()
-            font.setBold(True)
-            return font
+    def _data_display(self, index: QModelIndex):
+        """Gets the text shown in a cell, with the parsed value of a leaf
+        in the third column.
 
-        if role == Qt.TextAlignmentRole:
-            return int(Qt.AlignTop | Qt.AlignLeft)
+        Args:
+            index (QModelIndex): Index to get data for
 
-        if role == Qt.DisplayRole:
+        Returns:
+            str: The text
+        """
+        if index.column() == 2:
             node = self.nodeFromIndex(index)
-            if node:
-                # the first column is either a leaf key or a branch
-                # the second column is always a leaf value or for a branch is ''.
-                if isinstance(node, BranchNode):
-                    # Handle a branch (which is a nested subdictionary, which can be expanded)
-                    if index.column() == 0:
-                        return node.name
-                    return ''
-                # We have a leaf
-                elif index.column() == 0:
-                    return str(node.label)  # key
-                elif index.column() == 1:
-                    return str(node.value)  # value
-                elif index.column() == 2:
-                    # TODO: If the parser fails, this can throw an error
-                    return str(self.design.parse_value(node.value))
-                else:
-                    return None
-
-        return None
+            if isinstance(node, LeafNode):
+                # TODO: If the parser fails, this can throw an error
+                return str(self.design.parse_value(node.value))
+        return super()._data_display(index)
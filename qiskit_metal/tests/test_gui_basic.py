@@ -19,9 +19,31 @@
 Test a planar design and launching the GUI.
 """
 
+import os
 import unittest
+from types import SimpleNamespace
+
+from PySide2.QtCore import QModelIndex, Qt
+from PySide2.QtWidgets import QApplication
+
+from qiskit_metal import logger
 from qiskit_metal._gui.widgets.bases.dict_tree_base import BranchNode
 from qiskit_metal._gui.widgets.bases.dict_tree_base import LeafNode
+from qiskit_metal._gui.widgets.bases.dict_tree_base import QTreeModel_Base
+from qiskit_metal._gui.widgets.bases.dict_tree_base import _row_runs
+
+
+class DictTreeModel(QTreeModel_Base):
+    """Tree model over a plain dict, without a GUI or view."""
+
+    def __init__(self, data: dict):
+        self._data_dict = data
+        super().__init__(None, SimpleNamespace(logger=logger), None, 'test')
+
+    @property
+    def data_dict(self) -> dict:
+        """Return the dict shown by the model."""
+        return self._data_dict
 
 
 class TestGUIBasic(unittest.TestCase):
@@ -51,6 +73,136 @@ class TestGUIBasic(unittest.TestCase):
             message = "LeafNode instantiation failed"
             self.fail(message)
 
+    def test_branch_node_child_with_key(self):
+        """Test BranchNode.childWithKey after inserting and removing children."""
+        branch = BranchNode('my_name')
+        leaf_a = LeafNode('a')
+        leaf_b = LeafNode('b')
+        branch.insertChild(leaf_a)
+        branch.insertChild(leaf_b)
+
+        self.assertIs(branch.childWithKey('a'), leaf_a)
+        self.assertIs(branch.childWithKey('b'), leaf_b)
+        self.assertIsNone(branch.childWithKey('c'))
+
+        branch.removeChildren(0, 1)
+        self.assertIsNone(branch.childWithKey('a'))
+        self.assertIs(branch.childWithKey('b'), leaf_b)
+        self.assertEqual(len(branch), 1)
+
+    def test_branch_node_row_of_child(self):
+        """Test BranchNode.rowOfChild after inserting and removing children."""
+        branch = BranchNode('my_name')
+        leaves = [LeafNode(label) for label in 'abcd']
+        for leaf in leaves:
+            branch.insertChild(leaf)
+
+        self.assertEqual(branch.rowOfChild(leaves[2]), 2)
+
+        branch.removeChildren(1, 2)
+        self.assertEqual(branch.rowOfChild(leaves[0]), 0)
+        self.assertEqual(branch.rowOfChild(leaves[1]), -1)
+        self.assertEqual(branch.rowOfChild(leaves[3]), 1)
+        self.assertIs(branch.childAtRow(1), leaves[3])
+
+    def test_row_runs(self):
+        """Test _row_runs grouping of rows into contiguous runs."""
+        self.assertEqual(_row_runs([]), [])
+        self.assertEqual(_row_runs([3]), [[3, 3]])
+        self.assertEqual(_row_runs([0, 1, 2, 5, 7, 8]),
+                         [[0, 2], [5, 5], [7, 8]])
+
+    def test_leaf_node_path(self):
+        """Test LeafNode.path is derived from the parent chain."""
+        root = BranchNode('')
+        branch = BranchNode('a')
+        leaf = LeafNode('b')
+        self.assertEqual(leaf.path, ())
+
+        root.insertChild(branch)
+        branch.insertChild(leaf)
+        self.assertEqual(leaf.path, ('a', 'b'))
+        self.assertEqual(LeafNode('c', path=('x', 'c')).path, ('x', 'c'))
+
+    def test_leaf_node_display(self):
+        """Test LeafNode.display follows changes of the value."""
+        data = {'a': '1', 'b': [1]}
+        leaf_a = LeafNode('a', parent_dict=data)
+        leaf_b = LeafNode('b', parent_dict=data)
+        self.assertEqual(leaf_a.display(0), 'a')
+        self.assertEqual(leaf_a.display(1), '1')
+        self.assertIsNone(leaf_a.display(2))
+
+        data['a'] = '2'
+        self.assertEqual(leaf_a.display(1), '2')
+
+        self.assertEqual(leaf_b.display(1), '[1]')
+        data['b'].append(2)  # changed in place
+        self.assertEqual(leaf_b.display(1), '[1, 2]')
+
+    def _make_model(self, data: dict) -> DictTreeModel:
+        """Make a model over the given dict, with its root rows loaded."""
+        if QApplication.instance() is None:
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+            TestGUIBasic._app = QApplication([])  # keep it alive
+        model = DictTreeModel(data)
+        model.rowCount(QModelIndex())
+        return model
+
+    def test_tree_model_sync_rows(self):
+        """Test QTreeModel_Base syncs its rows with the changed dict."""
+        data = {'a': '1', 'b': {'c': '2'}, 'd': '3', 'e': '4'}
+        model = self._make_model(data)
+        root = model.root
+        self.assertEqual([key for key, _ in root.children],
+                         ['a', 'b', 'd', 'e'])
+
+        node_e = root.childWithKey('e')
+        del data['a']  # removed
+        data['f'] = '5'  # added
+        data['b'] = '6'  # dict replaced by a plain value
+        data['d'] = {'g': '7'}  # plain value replaced by a dict
+        model.refresh()
+
+        # Replaced children move to the end
+        self.assertEqual([key for key, _ in root.children],
+                         ['e', 'f', 'b', 'd'])
+        for row, (_, child) in enumerate(root.children):
+            self.assertEqual(child._row_in_parent, row)
+            self.assertEqual(root.rowOfChild(child), row)
+        self.assertIs(root.childWithKey('e'), node_e)
+        self.assertIsInstance(root.childWithKey('b'), LeafNode)
+        self.assertIsInstance(root.childWithKey('d'), BranchNode)
+        self.assertEqual(root.childWithKey('b').value, '6')
+
+        index_d = model.index(3, 0, QModelIndex())
+        self.assertEqual(model.rowCount(index_d), 1)
+        self.assertEqual(model.data(model.index(0, 1, index_d), Qt.DisplayRole),
+                         '7')
+
+    def test_tree_model_sync_data_changed(self):
+        """Test QTreeModel_Base signals dataChanged only for changed leaves."""
+        data = {'a': '1', 'b': '2', 'c': {'d': '3'}}
+        model = self._make_model(data)
+        for row in range(2):
+            model.data(model.index(row, 1, QModelIndex()), Qt.DisplayRole)
+
+        changed = []
+
+        def on_data_changed(top_left, bottom_right, roles):
+            changed.append((top_left.row(), bottom_right.row(),
+                            top_left.internalPointer()))
+
+        model.dataChanged.connect(on_data_changed)
+        model.refresh()
+        self.assertEqual(changed, [])
+
+        data['b'] = '5'
+        model.refresh()
+        self.assertEqual(changed, [(1, 1, model.root.childWithKey('b'))])
+        self.assertEqual(
+            model.data(model.index(1, 1, QModelIndex()), Qt.DisplayRole), '5')
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)